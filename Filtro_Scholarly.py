@@ -1,24 +1,66 @@
 import spacy
 import yake
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.metrics.pairwise import linear_kernel
 import numpy as np
 from scholarly import scholarly
+import hashlib
 import json
+import re
+import shelve
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 import os
 import requests
+from requests.adapters import HTTPAdapter
+
+# orjson e opcional: serializa bem mais rapido que o json da biblioteca padrao
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Sessao HTTP compartilhada: reaproveita conexoes (keep-alive) entre as requisicoes
+sessao = requests.Session()
+sessao.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+sessao.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
 # Pipeline para coleta, pre-processamento e analise de texto completo
 
 # 1. Coleta de dados via Google Scholar
 
+# Cache em disco das buscas, indexado por (query, max_resultados) e valido por 24 horas;
+# o scholarly limita a taxa de requisicoes, entao o cache e o unico ganho real em buscas repetidas
+CAMINHO_CACHE = "scholarly_cache"
+VALIDADE_CACHE = 24 * 60 * 60
+
+def _ler_cache(query, max_resultados):
+
+    with shelve.open(CAMINHO_CACHE) as cache:
+        entrada = cache.get(json.dumps([query, max_resultados]))
+    if entrada and time.time() - entrada["data"] < VALIDADE_CACHE:
+        return entrada["artigos"]
+    return None
+
+def _gravar_cache(query, max_resultados, artigos):
+
+    with shelve.open(CAMINHO_CACHE) as cache:
+        cache[json.dumps([query, max_resultados])] = {"data": time.time(), "artigos": artigos}
+
 # Funcao para buscar artigos usando a biblioteca scholarly
 def coletar_artigos(query, max_resultados=10):
-    resultados = scholarly.search_pubs(query)
-    artigos = []
+    artigos = _ler_cache(query, max_resultados)
+    if artigos is not None:
+        return artigos
 
-    for i, resultado in enumerate(resultados):
-        if i >= max_resultados:
-            break
+    # As paginas de resultados sao buscadas em serie; paralelizar essas requisicoes dispara o captcha
+    resultados = islice(scholarly.search_pubs(query), max(max_resultados, 0))
+
+    artigos = []
+    for resultado in resultados:
         artigo = {
             "titulo": resultado.get("bib", {}).get("title", "Título não disponível"),
             "resumo": resultado.get("bib", {}).get("abstract", "Resumo não disponível"),
@@ -26,35 +68,60 @@ def coletar_artigos(query, max_resultados=10):
         }
         artigos.append(artigo)
 
+    _gravar_cache(query, max_resultados, artigos)
     return artigos
 
 # 2. Pre-processamento de texto
 # Configurar o modelo de NLP (SpaCy)
 # Baixe os modelos com "python -m spacy download en_core_web_sm" e "python -m spacy download pt_core_news_sm"
-nlp_en = spacy.load("en_core_web_sm")
-nlp_pt = spacy.load("pt_core_news_sm")
+# Parser e NER nao sao usados (apenas lemma_, is_stop e is_punct); o attribute_ruler e mantido
+# porque o lematizador depende das classes gramaticais que ele atribui
+nlp_en = spacy.load("en_core_web_sm", disable=["parser", "ner"])
+nlp_pt = spacy.load("pt_core_news_sm", disable=["parser", "ner"])
 
 # Gerar palavras de parada para portugues usando SpaCy
 stop_words_pt = list(nlp_pt.Defaults.stop_words)
 
-def preprocessar_texto(texto, idioma="en"):
+# Lematizacao em lote via nlp.pipe. O fluxo de execucao abaixo nao usa a lematizacao;
+# as funcoes ficam disponiveis para uso a partir de outros scripts ou notebooks
+def preprocessar_textos(textos, idioma="en"):
 
-    if idioma == "pt":
-        doc = nlp_pt(texto)
-    else:
-        doc = nlp_en(texto)
+    nlp = nlp_pt if idioma == "pt" else nlp_en
+
+    # Multiprocessamento so compensa em corpora maiores; em lotes pequenos o custo de iniciar processos domina
+    # Geradores nao tem tamanho conhecido e sao processados em um unico processo
+    n_process = 1
+    if hasattr(textos, "__len__") and len(textos) > 300:
+        n_process = max(1, (os.cpu_count() or 1) - 1)
+
+    for doc in nlp.pipe(textos, batch_size=64, n_process=n_process):
+        yield [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
+
+def preprocessar_texto(texto, idioma="en"):
 
-    tokens = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
-    return tokens
+    return next(preprocessar_textos([texto], idioma=idioma))
 
 # 3. Extracao de palavras-chave
 # Usando YAKE
+# Reutilizar o extrator entre chamadas, evitando recarregar stopwords e configuracao a cada artigo
+@lru_cache(maxsize=8)
+def _obter_extrator_yake(idioma, max_palavras):
+
+    return yake.KeywordExtractor(lan=idioma, top=max_palavras)
+
 def extrair_palavras_chave_yake(texto, max_palavras=10, idioma="en"):
 
-    kw_extractor = yake.KeywordExtractor(lan=idioma, top=max_palavras)
+    kw_extractor = _obter_extrator_yake(idioma, max_palavras)
     keywords = kw_extractor.extract_keywords(texto)
     return keywords
 
+# Extrai as palavras-chave de varios textos com um unico extrator
+def extrair_palavras_chave_yake_lote(textos, max_palavras=10, idioma="en"):
+
+    kw_extractor = _obter_extrator_yake(idioma, max_palavras)
+    for texto in textos:
+        yield kw_extractor.extract_keywords(texto)
+
 # Usando TF-IDF
 def extrair_palavras_chave_tfidf(textos, max_features=10):
 
@@ -67,50 +134,90 @@ def extrair_palavras_chave_tfidf(textos, max_features=10):
 def calcular_relevancia(artigos, termo_referencia, idioma="en"):
 
     stop_words = stop_words_pt if idioma == "pt" else 'english'
-    textos = [artigo['resumo'] for artigo in artigos if artigo['resumo'] != "Resumo não disponível"]
+    artigos_com_resumo = [artigo for artigo in artigos if artigo['resumo'] != "Resumo não disponível"]
     tfidf = TfidfVectorizer(stop_words=stop_words)
 
-    # Adicionar o termo de referencia como um documento adicional
-    matriz_tfidf = tfidf.fit_transform(textos + [termo_referencia])
-    
-    # Calcular similaridade do termo com cada texto
-    similaridades = cosine_similarity(matriz_tfidf[-1], matriz_tfidf[:-1]).flatten()
-    
+    # Artigos sem resumo (ou sem termos em comum com a query) ficam com relevancia 0
+    for artigo in artigos:
+        artigo['relevancia'] = 0
+
+    # Com no maximo um resumo o IDF e degenerado; a relevancia passa a ser apenas a presenca
+    # de algum termo da query no resumo, sem ajustar o TF-IDF
+    if len(artigos_com_resumo) <= 1:
+        analisar = tfidf.build_analyzer()
+        termos_referencia = set(analisar(termo_referencia))
+        for artigo in artigos_com_resumo:
+            if termos_referencia.intersection(analisar(artigo['resumo'])):
+                artigo['relevancia'] = 1.0
+        artigos.sort(key=lambda x: x['relevancia'], reverse=True)
+        return artigos
+
+    # O IDF e estimado apenas com os resumos; o termo de referencia e so transformado.
+    # Os resumos sao passados por um gerador, sem montar uma lista de textos
+    try:
+        matriz_tfidf = tfidf.fit_transform(artigo['resumo'] for artigo in artigos_com_resumo)
+    except ValueError:
+        # Resumos apenas com palavras de parada geram vocabulario vazio; todos ficam com relevancia 0
+        return artigos
+    vetor_referencia = tfidf.transform([termo_referencia])
+
+    # Calcular similaridade do termo com cada texto (norm='l2' por padrao: produto escalar = cosseno; resultado esparso)
+    similaridades = linear_kernel(vetor_referencia, matriz_tfidf, dense_output=False).tocoo()
+
     # Adicionar as similaridades aos artigos
-    for i, artigo in enumerate(artigos):
-        artigo['relevancia'] = similaridades[i] if i < len(similaridades) else 0
+    for coluna, similaridade in zip(similaridades.col, similaridades.data):
+        artigos_com_resumo[coluna]['relevancia'] = similaridade
 
-    # Ordenar os artigos pela relevância
-    artigos_ordenados = sorted(artigos, key=lambda x: x['relevancia'], reverse=True)
-    return artigos_ordenados
+    # Ordenar os artigos pela relevância, sem copiar a lista
+    artigos.sort(key=lambda x: x['relevancia'], reverse=True)
+    return artigos
 
 # 5. Salvar artigos localmente
-def salvar_artigos(artigos, caminho="artigos_relevantes.json"):
-
-    with open(caminho, "w", encoding="utf-8") as f:
-        json.dump(artigos, f, ensure_ascii=False, indent=4)
+# Formato JSONL (um artigo por linha) em modo de acrescimo: cada chamada grava apenas os
+# artigos recebidos, sem reescrever o que ja foi salvo
+def salvar_artigos(artigos, caminho="artigos_relevantes.jsonl"):
+
+    if orjson is not None:
+        # OPT_SERIALIZE_NUMPY cobre as relevancias, que sao numpy.float64
+        with open(caminho, "ab") as f:
+            for artigo in artigos:
+                f.write(orjson.dumps(artigo, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+    else:
+        with open(caminho, "a", encoding="utf-8") as f:
+            for artigo in artigos:
+                f.write(json.dumps(artigo, ensure_ascii=False) + "\n")
 
-def baixar_pdf(artigo, pasta_destino="pdfs"):
+# Caracteres invalidos em nomes de arquivo, trocados por "_" no titulo do PDF
+CARACTERES_INVALIDOS = re.compile(r"[^\w\-. ]")
 
-    if not os.path.exists(pasta_destino):
-        os.makedirs(pasta_destino)
+# A pasta de destino deve existir; ela e criada uma unica vez no inicio da execucao
+def baixar_pdf(artigo, pasta_destino="pdfs", sessao=sessao):
 
     link = artigo.get("link")
     if link:
         try:
-            response = requests.get(link, stream=True)
-            if response.status_code == 200:
-                arquivo_pdf = os.path.join(pasta_destino, f"{artigo['titulo'][:50]}.pdf")
-                with open(arquivo_pdf, "wb") as f:
-                    for chunk in response.iter_content(chunk_size=1024):
-                        f.write(chunk)
-                return True
+            with sessao.get(link, stream=True, timeout=(5, 30)) as response:
+                if response.status_code == 200:
+                    # Titulos repetidos (ou que so diferem em caracteres invalidos) geram o mesmo
+                    # nome; o hash do link torna o arquivo unico por link
+                    nome_arquivo = CARACTERES_INVALIDOS.sub("_", artigo['titulo'][:50])
+                    sufixo = hashlib.sha1(link.encode("utf-8")).hexdigest()[:8]
+                    arquivo_pdf = os.path.join(pasta_destino, f"{nome_arquivo}_{sufixo}.pdf")
+                    # Copiar direto do stream em blocos de 64 KB (menos iteracoes e syscalls do que
+                    # blocos de 1 KB); decode_content descompacta respostas com gzip/deflate
+                    response.raw.decode_content = True
+                    with open(arquivo_pdf, "wb") as f:
+                        shutil.copyfileobj(response.raw, f, length=1 << 16)
+                    return True
         except Exception as e:
             print(f"Erro ao baixar PDF: {e}")
     return False
 
 # 6. Execucao
 if __name__ == "__main__":
+    # Criar a pasta dos PDFs uma unica vez, antes dos downloads
+    os.makedirs("pdfs", exist_ok=True)
+
     # Solicitar entrada do usuario para o tema de busca
     tema = input("Digite o tema que deseja pesquisar: ")
 
@@ -143,25 +250,35 @@ if __name__ == "__main__":
         # Filtrar artigos com relevancia
         artigos_relevantes = [artigo for artigo in artigos_ordenados if artigo['relevancia'] > 0]
 
+        # Extrair as palavras-chave de todos os artigos com o mesmo extrator
+        palavras_chave_por_artigo = extrair_palavras_chave_yake_lote(
+            (artigo['resumo'] for artigo in artigos_relevantes), idioma=idioma
+        )
+
         # Exibir artigos relevantes
-        for artigo in artigos_relevantes:
+        for artigo, palavras_chave in zip(artigos_relevantes, palavras_chave_por_artigo):
             print(f"Título: {artigo['titulo']}")
             print(f"Relevância: {artigo['relevancia']:.2f}")
             print(f"Link: {artigo['link']}")
 
-            # Extrair e imprimir palavras-chave
-            palavras_chave = extrair_palavras_chave_yake(artigo['resumo'], idioma=idioma)
+            # Imprimir palavras-chave
             print("Palavras-chave extraídas:")
             for palavra, score in palavras_chave:
                 print(f"  {palavra} (score: {score:.4f})")
 
-            # Tentar baixar PDF
-            if baixar_pdf(artigo):
-                print("PDF baixado com sucesso.")
+        # Baixar os PDFs em paralelo; o tempo e dominado pela rede, que libera o GIL
+        # Cada link e baixado uma unica vez, para que duas threads nunca escrevam no mesmo arquivo
+        artigos_por_link = {artigo['link']: artigo for artigo in artigos_relevantes}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            baixados = dict(zip(artigos_por_link, executor.map(baixar_pdf, artigos_por_link.values())))
+
+        for artigo in artigos_relevantes:
+            if baixados[artigo['link']]:
+                print(f"PDF baixado com sucesso: {artigo['titulo']}")
             else:
-                print("Não foi possível baixar o PDF.")
+                print(f"Não foi possível baixar o PDF: {artigo['titulo']}")
 
-        # Salvar artigos relevantes em JSON
+        # Salvar artigos relevantes em JSONL
         salvar_artigos(artigos_relevantes)
         print("Artigos relevantes salvos com sucesso.")
     else:
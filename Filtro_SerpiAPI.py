@@ -1,18 +1,58 @@
 import spacy
 import yake
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
 import numpy as np
+from scipy.sparse import vstack
+import hashlib
 import json
+import re
+import shelve
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import os
 import requests
+from requests.adapters import HTTPAdapter
+
+# orjson é opcional: serializa bem mais rápido que o json da biblioteca padrão
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Sessão HTTP compartilhada: reaproveita conexões (keep-alive) entre as requisições
+sessao = requests.Session()
+sessao.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+sessao.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
 
 # Pipeline para coleta, pre-processamento e análise de texto completo
 
 # 1. Coleta de dados via Google Scholar
 
+# Cache em disco das buscas, indexado por (query, max_resultados) e válido por 24 horas;
+# buscas repetidas não consomem a cota mensal da SerpAPI
+CAMINHO_CACHE = "serpapi_cache"
+VALIDADE_CACHE = 24 * 60 * 60
+
+def _ler_cache(query, max_resultados):
+    with shelve.open(CAMINHO_CACHE) as cache:
+        entrada = cache.get(json.dumps([query, max_resultados]))
+    if entrada and time.time() - entrada["data"] < VALIDADE_CACHE:
+        return entrada["artigos"]
+    return None
+
+def _gravar_cache(query, max_resultados, artigos):
+    with shelve.open(CAMINHO_CACHE) as cache:
+        cache[json.dumps([query, max_resultados])] = {"data": time.time(), "artigos": artigos}
+
 # Usando SerpAPI, eles dão direito a 100 pesquisas por mês
 def coletar_artigos(query, max_resultados=10, api_key="-------------------------------"):
+    artigos = _ler_cache(query, max_resultados)
+    if artigos is not None:
+        return artigos
+
     url = "https://serpapi.com/search"
     params = {
         "engine": "google_scholar",
@@ -21,7 +61,11 @@ def coletar_artigos(query, max_resultados=10, api_key="-------------------------
         "num": max_resultados,
     }
 
-    response = requests.get(url, params=params)
+    try:
+        response = sessao.get(url, params=params, timeout=(5, 30))
+    except requests.RequestException as e:
+        print(f"Erro ao acessar SerpApi: {e}")
+        return []
     if response.status_code == 200:
         resultados = response.json().get("organic_results", [])
         artigos = []
@@ -32,6 +76,7 @@ def coletar_artigos(query, max_resultados=10, api_key="-------------------------
                 "link": resultado.get("link", ""),
             }
             artigos.append(artigo)
+        _gravar_cache(query, max_resultados, artigos)
         return artigos
     else:
         print(f"Erro ao acessar SerpApi: {response.status_code}, {response.text}")
@@ -40,28 +85,49 @@ def coletar_artigos(query, max_resultados=10, api_key="-------------------------
 # 2. Pre-processamento de texto
 # Configurar o modelo de NLP (SpaCy)
 # Baixe os modelos com "python -m spacy download en_core_web_sm" e "python -m spacy download pt_core_news_sm"
-nlp_en = spacy.load("en_core_web_sm")
-nlp_pt = spacy.load("pt_core_news_sm")
+# Parser e NER não são usados (apenas lemma_, is_stop e is_punct); o attribute_ruler é mantido
+# porque o lematizador depende das classes gramaticais que ele atribui
+nlp_en = spacy.load("en_core_web_sm", disable=["parser", "ner"])
+nlp_pt = spacy.load("pt_core_news_sm", disable=["parser", "ner"])
 
 # Gerar palavras de parada para português usando SpaCy
 stop_words_pt = list(nlp_pt.Defaults.stop_words)
 
-def preprocessar_texto(texto, idioma="en"):
-    if idioma == "pt":
-        doc = nlp_pt(texto)
-    else:
-        doc = nlp_en(texto)
+# Lematização em lote via nlp.pipe. O fluxo de execução abaixo não usa a lematização;
+# as funções ficam disponíveis para uso a partir de outros scripts ou notebooks
+def preprocessar_textos(textos, idioma="en"):
+    nlp = nlp_pt if idioma == "pt" else nlp_en
+
+    # Multiprocessamento só compensa em corpora maiores; em lotes pequenos o custo de iniciar processos domina
+    # Geradores não têm tamanho conhecido e são processados em um único processo
+    n_process = 1
+    if hasattr(textos, "__len__") and len(textos) > 300:
+        n_process = max(1, (os.cpu_count() or 1) - 1)
 
-    tokens = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
-    return tokens
+    for doc in nlp.pipe(textos, batch_size=64, n_process=n_process):
+        yield [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
+
+def preprocessar_texto(texto, idioma="en"):
+    return next(preprocessar_textos([texto], idioma=idioma))
 
 # 3. Extração de palavras-chave
 # Usando YAKE
+# Reutilizar o extrator entre chamadas, evitando recarregar stopwords e configuração a cada artigo
+@lru_cache(maxsize=8)
+def _obter_extrator_yake(idioma, max_palavras):
+    return yake.KeywordExtractor(lan=idioma, top=max_palavras)
+
 def extrair_palavras_chave_yake(texto, max_palavras=10, idioma="en"):
-    kw_extractor = yake.KeywordExtractor(lan=idioma, top=max_palavras)
+    kw_extractor = _obter_extrator_yake(idioma, max_palavras)
     keywords = kw_extractor.extract_keywords(texto)
     return keywords
 
+# Extrai as palavras-chave de vários textos com um único extrator
+def extrair_palavras_chave_yake_lote(textos, max_palavras=10, idioma="en"):
+    kw_extractor = _obter_extrator_yake(idioma, max_palavras)
+    for texto in textos:
+        yield kw_extractor.extract_keywords(texto)
+
 # Usando TF-IDF
 def extrair_palavras_chave_tfidf(textos, max_features=10):
     tfidf = TfidfVectorizer(max_features=max_features, stop_words='english')
@@ -70,50 +136,118 @@ def extrair_palavras_chave_tfidf(textos, max_features=10):
     return palavras_chave
 
 # 4. Relevância baseada em similaridade
-def calcular_relevancia(artigos, termo_referencia, idioma="en"):
+# Um vetorizador por idioma, reaproveitado entre chamadas. O HashingVectorizer não guarda
+# vocabulário, então as linhas já calculadas continuam válidas quando o corpus cresce.
+# O scikit-learn só aceita lista (e não set) em stop_words, por isso stop_words_pt é uma lista
+@lru_cache(maxsize=None)
+def _obter_vetorizador(idioma):
     stop_words = stop_words_pt if idioma == "pt" else 'english'
-    textos = [artigo['resumo'] for artigo in artigos if artigo['resumo'] != "Resumo não disponível"]
-    tfidf = TfidfVectorizer(stop_words=stop_words)
-
-    # Adicionar o termo de referência como um documento adicional
-    matriz_tfidf = tfidf.fit_transform(textos + [termo_referencia])
-    
-    # Calcular similaridade do termo com cada texto
-    similaridades = cosine_similarity(matriz_tfidf[-1], matriz_tfidf[:-1]).flatten()
-    
+    return HashingVectorizer(n_features=2**18, alternate_sign=False, norm=None, stop_words=stop_words)
+
+# Corpus acumulado entre as iterações do loop interativo (apenas na sessão atual): cada resumo
+# é vetorizado uma única vez e sua linha em "contagens" é guardada em "textos". Apenas o IDF é
+# reajustado quando chegam resumos ainda não vistos; nas demais iterações apenas a query é vetorizada
+_estado_tfidf = {"idioma": None, "textos": {}, "contagens": None, "transformador": None}
+
+def calcular_relevancia(artigos, termo_referencia, idioma="en"):
+    artigos_com_resumo = [artigo for artigo in artigos if artigo['resumo'] != "Resumo não disponível"]
+    textos = [artigo['resumo'] for artigo in artigos_com_resumo]
+    vetorizador = _obter_vetorizador(idioma)
+
+    # Artigos sem resumo (ou sem termos em comum com a query) ficam com relevância 0
+    for artigo in artigos:
+        artigo['relevancia'] = 0
+
+    # Sem resumos no lote não há o que comparar
+    if not textos:
+        return artigos
+
+    # Trocar de idioma muda as palavras de parada, então o corpus acumulado é descartado
+    if _estado_tfidf["idioma"] != idioma:
+        _estado_tfidf.update(idioma=idioma, textos={}, contagens=None, transformador=None)
+
+    linhas = _estado_tfidf["textos"]
+    novos_textos = [texto for texto in dict.fromkeys(textos) if texto not in linhas]
+    if novos_textos:
+        for texto in novos_textos:
+            linhas[texto] = len(linhas)
+        contagens = vetorizador.transform(novos_textos)
+        if _estado_tfidf["contagens"] is not None:
+            contagens = vstack([_estado_tfidf["contagens"], contagens], format="csr")
+        _estado_tfidf["contagens"] = contagens
+        _estado_tfidf["transformador"] = TfidfTransformer().fit(contagens)
+
+    # O IDF vem do corpus acumulado; só com no máximo um resumo na sessão inteira ele é
+    # degenerado, e então a relevância passa a ser apenas a presença de algum termo da query
+    if len(linhas) <= 1:
+        analisar = vetorizador.build_analyzer()
+        termos_referencia = set(analisar(termo_referencia))
+        for artigo in artigos_com_resumo:
+            if termos_referencia.intersection(analisar(artigo['resumo'])):
+                artigo['relevancia'] = 1.0
+        artigos.sort(key=lambda x: x['relevancia'], reverse=True)
+        return artigos
+
+    # Só as linhas do lote atual são transformadas
+    transformador = _estado_tfidf["transformador"]
+    matriz_tfidf = transformador.transform(_estado_tfidf["contagens"][[linhas[texto] for texto in textos]])
+    vetor_referencia = transformador.transform(vetorizador.transform([termo_referencia]))
+
+    # Calcular similaridade do termo com cada texto (norm='l2' por padrão: produto escalar = cosseno; resultado esparso)
+    similaridades = linear_kernel(vetor_referencia, matriz_tfidf, dense_output=False).tocoo()
+
     # Adicionar as similaridades aos artigos
-    for i, artigo in enumerate(artigos):
-        artigo['relevancia'] = similaridades[i] if i < len(similaridades) else 0
+    for coluna, similaridade in zip(similaridades.col, similaridades.data):
+        artigos_com_resumo[coluna]['relevancia'] = similaridade
 
-    # Ordenar os artigos pela relevância
-    artigos_ordenados = sorted(artigos, key=lambda x: x['relevancia'], reverse=True)
-    return artigos_ordenados
+    # Ordenar os artigos pela relevância, sem copiar a lista
+    artigos.sort(key=lambda x: x['relevancia'], reverse=True)
+    return artigos
 
 # 5. Salvar artigos localmente
-def salvar_artigos(artigos, caminho="artigos_relevantes.json"):
-    with open(caminho, "w", encoding="utf-8") as f:
-        json.dump(artigos, f, ensure_ascii=False, indent=4)
+# Formato JSONL (um artigo por linha) em modo de acréscimo: cada chamada grava apenas os
+# artigos recebidos, sem reescrever o que já foi salvo
+def salvar_artigos(artigos, caminho="artigos_relevantes.jsonl"):
+    if orjson is not None:
+        # OPT_SERIALIZE_NUMPY cobre as relevâncias, que são numpy.float64
+        with open(caminho, "ab") as f:
+            for artigo in artigos:
+                f.write(orjson.dumps(artigo, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+    else:
+        with open(caminho, "a", encoding="utf-8") as f:
+            for artigo in artigos:
+                f.write(json.dumps(artigo, ensure_ascii=False) + "\n")
 
-def baixar_pdf(artigo, pasta_destino="pdfs"):
-    if not os.path.exists(pasta_destino):
-        os.makedirs(pasta_destino)
+# Caracteres inválidos em nomes de arquivo, trocados por "_" no título do PDF
+CARACTERES_INVALIDOS = re.compile(r"[^\w\-. ]")
 
+# A pasta de destino deve existir; ela é criada uma única vez no início da execução
+def baixar_pdf(artigo, pasta_destino="pdfs", sessao=sessao):
     link = artigo.get("link")
     if link:
         try:
-            response = requests.get(link, stream=True)
-            if response.status_code == 200:
-                arquivo_pdf = os.path.join(pasta_destino, f"{artigo['titulo'][:50]}.pdf")
-                with open(arquivo_pdf, "wb") as f:
-                    for chunk in response.iter_content(chunk_size=1024):
-                        f.write(chunk)
-                return True
+            with sessao.get(link, stream=True, timeout=(5, 30)) as response:
+                if response.status_code == 200:
+                    # Títulos repetidos (ou que só diferem em caracteres inválidos) geram o mesmo
+                    # nome; o hash do link torna o arquivo único por link
+                    nome_arquivo = CARACTERES_INVALIDOS.sub("_", artigo['titulo'][:50])
+                    sufixo = hashlib.sha1(link.encode("utf-8")).hexdigest()[:8]
+                    arquivo_pdf = os.path.join(pasta_destino, f"{nome_arquivo}_{sufixo}.pdf")
+                    # Copiar direto do stream em blocos de 64 KB (menos iterações e syscalls do que
+                    # blocos de 1 KB); decode_content descompacta respostas com gzip/deflate
+                    response.raw.decode_content = True
+                    with open(arquivo_pdf, "wb") as f:
+                        shutil.copyfileobj(response.raw, f, length=1 << 16)
+                    return True
         except Exception as e:
             print(f"Erro ao baixar PDF: {e}")
     return False
 
 # 6. Execução
 if __name__ == "__main__":
+    # Criar a pasta dos PDFs uma única vez, antes dos downloads
+    os.makedirs("pdfs", exist_ok=True)
+
     # Inicializar lista de artigos e a query acumulada
     artigos = []
     query_acumulada = ""
@@ -159,29 +293,41 @@ if __name__ == "__main__":
             # Adicionar novos artigos à lista principal
             artigos.extend(artigos_relevantes)
 
+            # Acrescentar os novos artigos ao arquivo JSONL
+            salvar_artigos(artigos_relevantes)
+
+            # Extrair as palavras-chave de todos os artigos com o mesmo extrator
+            palavras_chave_por_artigo = extrair_palavras_chave_yake_lote(
+                (artigo['resumo'] for artigo in artigos_relevantes), idioma=idioma
+            )
+
             # Exibir os artigos relevantes encontrados
-            for artigo in artigos_relevantes:
+            for artigo, palavras_chave in zip(artigos_relevantes, palavras_chave_por_artigo):
                 print(f"Título: {artigo['titulo']}")
                 print(f"Relevância: {artigo['relevancia']:.2f}")
                 print(f"Link: {artigo['link']}")
 
-                # Extrair e imprimir palavras-chave
-                palavras_chave = extrair_palavras_chave_yake(artigo['resumo'], idioma=idioma)
+                # Imprimir palavras-chave
                 print("Palavras-chave extraídas:")
                 for palavra, score in palavras_chave:
                     print(f"  {palavra} (score: {score:.4f})")
 
-                # Tentar baixar PDF
-                if baixar_pdf(artigo):
-                    print("PDF baixado com sucesso.")
+            # Baixar os PDFs em paralelo; o tempo é dominado pela rede, que libera o GIL
+            # Cada link é baixado uma única vez, para que duas threads nunca escrevam no mesmo arquivo
+            artigos_por_link = {artigo['link']: artigo for artigo in artigos_relevantes}
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                baixados = dict(zip(artigos_por_link, executor.map(baixar_pdf, artigos_por_link.values())))
+
+            for artigo in artigos_relevantes:
+                if baixados[artigo['link']]:
+                    print(f"PDF baixado com sucesso: {artigo['titulo']}")
                 else:
-                    print("Não foi possível baixar o PDF.")
+                    print(f"Não foi possível baixar o PDF: {artigo['titulo']}")
         else:
             print(f"Nenhum artigo encontrado para a pesquisa '{query_acumulada}'.")
 
-    # Salvar todos os artigos coletados em JSON
+    # Os artigos já foram salvos a cada pesquisa
     if artigos:
-        salvar_artigos(artigos)
         print("Todos os artigos relevantes salvos com sucesso.")
     else:
         print("Nenhum artigo relevante foi coletado.")